@@ -0,0 +1,101 @@
+"""
+Semantic cache for GPT summaries.
+
+Stores one embedding per summarised pitch in a local SQLite database and
+uses sqlite-vec's ``vec_distance_cosine`` to find the nearest prior pitch,
+so lightly edited resubmissions reuse the earlier summary instead of
+triggering a new completion.
+"""
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+try:
+    import sqlite_vec
+except ImportError:                 # cache silently disabled without sqlite-vec
+    sqlite_vec = None
+
+# Some Python builds (e.g. pyenv without --enable-loadable-sqlite-extensions)
+# cannot load sqlite-vec at all
+_CAN_LOAD_EXTENSIONS = hasattr(sqlite3.Connection, "enable_load_extension")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    id           INTEGER PRIMARY KEY,
+    namespace    TEXT NOT NULL,
+    embedding    BLOB NOT NULL,
+    summary_json TEXT NOT NULL,
+    ts           REAL NOT NULL,
+    ttl          REAL NOT NULL
+)
+"""
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour lookup of summaries, namespaced by model + prompt
+    version and scoped per submitter: a near-duplicate deck from someone
+    else must never pre-fill another company's summary (NDA).
+    """
+
+    def __init__(self, db_path: str, namespace: str,
+                 max_distance: float = 0.05, ttl: float = 30 * 24 * 3600):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.max_distance = max_distance        # cosine similarity >= 0.95
+        self.ttl = ttl
+        self._failed = False
+
+    @property
+    def enabled(self) -> bool:
+        return sqlite_vec is not None and _CAN_LOAD_EXTENSIONS and not self._failed
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call (callers close it): Streamlit
+        # serves sessions from several threads and sqlite3 connections must
+        # not be shared.
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.enable_load_extension(True)
+            sqlite_vec.load(conn)
+            conn.enable_load_extension(False)
+            conn.execute(_SCHEMA)
+        except Exception:
+            # the extension will not load on later calls either: stop paying
+            # for an embedding on every miss
+            conn.close()
+            self._failed = True
+            raise
+        return conn
+
+    def _scoped(self, scope: str) -> str:
+        return f"{self.namespace}:{scope}"
+
+    def lookup(self, embedding: List[float], scope: str) -> Optional[Dict[str, Any]]:
+        """Return the closest live summary of `scope` within max_distance, else None."""
+        if not self.enabled:
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT summary_json, vec_distance_cosine(embedding, ?) AS dist "
+                "FROM summaries WHERE namespace = ? AND ts + ttl > ? "
+                "ORDER BY dist LIMIT 1",
+                (sqlite_vec.serialize_float32(embedding), self._scoped(scope), time.time()),
+            ).fetchone()
+        if row is None or row[1] >= self.max_distance:
+            return None
+        return orjson.loads(row[0])
+
+    def store(self, embedding: List[float], summary: Dict[str, Any], scope: str):
+        if not self.enabled:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO summaries (namespace, embedding, summary_json, ts, ttl) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._scoped(scope), sqlite_vec.serialize_float32(embedding),
+                 orjson.dumps(summary).decode(), time.time(), self.ttl),
+            )
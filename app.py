@@ -1,37 +1,69 @@
 import os
+import re
+import atexit
 import io
-import json
 import random
-import difflib
-from datetime import datetime
+import hashlib
+import hmac
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import streamlit as st
 import openai
+import httpx
+import tiktoken
+import orjson
 import pandas as pd
-import fitz  # PyMuPDF
-from docx import Document
-from pptx import Presentation
-import matplotlib.pyplot as plt
+import altair as alt
 from PIL import Image
+from rapidfuzz import process, fuzz, utils
+from office365.runtime.auth.client_credential import ClientCredential
+from office365.sharepoint.client_context import ClientContext
 
 # Local .env for development; Streamlit Cloud uses st.secrets
 from dotenv import load_dotenv
 load_dotenv(Path(__file__).parent / ".env")
 
+from _semantic_cache import SemanticCache
+from extraction import extract_isolated, extract_text_from_bytes, extract_text_from_file
+from constants import (
+    CHARS_PER_TOKEN, COUNTRY_OPTIONS, MATURITY_STAGES, MATURITY_STAGES_IDX,
+    MAX_PITCH_TOKENS, REGION_OPTIONS, REVIEW_STAGES, REVIEW_STAGES_IDX,
+    SDG_OPTIONS, SECTOR_OPTIONS,
+)
+
 # ── Page config ─────────────────────────────────────────────────
 st.set_page_config(layout="wide", page_title="Impact Project Room")
 
 # ── OpenAI API key ────────────────────────────────────────────────
 try:
-    openai.api_key = st.secrets["OPENAI_API_KEY"]
+    OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
 except KeyError:
     st.error(
         "🔒 OPENAI_API_KEY missing. Add it under 'Manage app → Settings → Secrets'."
     )
     st.stop()
 
+@st.cache_resource
+def _openai_client() -> openai.OpenAI:
+    """One client per server process so TLS/HTTP2 connections are reused."""
+    return openai.OpenAI(
+        api_key=OPENAI_API_KEY,
+        timeout=60,
+        max_retries=2,
+        http_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=8),
+            timeout=60,
+        ),
+    )
+
 # ── Logo ──────────────────────────────────────────────────────────
 logo_path = Path(__file__).with_name("logo.png")
 if logo_path.exists():
@@ -42,6 +74,24 @@ if logo_path.exists():
 # ── Constants ─────────────────────────────────────────────────────
 UPLOAD_FOLDER = "submissions"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+TEXT_CACHE_FILE = "_text.cache"                    # extracted pitch text per submission
+TEXT_EXTENSIONS = (".pdf", ".docx", ".pptx", ".xls", ".xlsx")
+COPY_CHUNK_SIZE = 1 << 20                          # 1 MiB streaming buffer
+IN_MEMORY_MAX_SIZE = 8 << 20                       # uploads up to 8 MiB are parsed without touching disk
+EXTRACT_TIMEOUT = 120                              # seconds per document
+SP_CHUNK_SIZE = 4 * 1024 * 1024                    # larger files use a SharePoint upload session
+
+# GPT summary cache (bump PROMPT_VERSION whenever the prompt changes)
+GPT_MODEL = "gpt-3.5-turbo"                        # 16k context + JSON mode; or "gpt-4o-mini"
+PROMPT_VERSION = "v3"
+GPT_CACHE_FOLDER = os.path.join(UPLOAD_FOLDER, ".gpt_cache")
+os.makedirs(GPT_CACHE_FOLDER, exist_ok=True)
+EMBEDDING_MODEL = "text-embedding-3-small"
+MAX_EMBED_TOKENS = 8191                            # embedding input limit (< MAX_PITCH_TOKENS)
+SEMANTIC_CACHE = SemanticCache(
+    os.path.join(GPT_CACHE_FOLDER, "semantic.sqlite3"),
+    namespace=f"{GPT_MODEL}:{PROMPT_VERSION}",
+)
 
 AI_FIELDS = [
     "Project Name", "Specific Sector(s)", "Region of operation", "Main country of current operations",
@@ -51,179 +101,288 @@ AI_FIELDS = [
     "Use of proceeds (%)", "Impact Area", "3 main SDGs targeted",
     "Problem", "Solution", "Barrier(s) to entry",
 ]
-REVIEW_STAGES = [
-    "Identified", "Intro call", "NDA and Deck", "Financials", "4-pager",
-    "IC1", "IC2", "Local DD", "Raised", "Operating", "Exited", "Bankrupt",
-]
-SDG_OPTIONS = [
-    "No poverty (SDG 1)", "Zero hunger (SDG 2)", "Good health and well-being (SDG 3)",
-    "Quality education (SDG 4)", "Gender equality (SDG 5)", "Clean water and sanitation (SDG 6)",
-    "Affordable and clean energy (SDG 7)", "Decent work and economic growth (SDG 8)",
-    "Industry, innovation and infrastructure (SDG 9)", "Reduced inequalities (SDG 10)",
-    "Sustainable cities and communities (SDG 11)", "Responsible consumption and production (SDG 12)",
-    "Climate action (SDG 13)", "Life below water (SDG 14)", "Life on land (SDG 15)",
-    "Peace, justice, and strong institutions (SDG 16)", "Partnerships for the goals (SDG 17)",
-]
-MATURITY_STAGES = ["Ideation", "Validation", "Pilot", "Growth", "Scale", "Mature"]
-SECTOR_OPTIONS = [
-    "Agriculture", "Air", "Biodiversity & ecosystems", "Climate", "Diversity & inclusion",
-    "Education", "Employment / Livelihoods creation", "Energy", "Financial services",
-    "Health", "Infrastructure", "Land", "Oceans & coastal zones",
-    "Sustainable cities", "Sustainable consumption & production", "Sustainable tourism",
-    "Water Treatment", "Other",
-]
-# ISO‑style country display list 
-COUNTRY_OPTIONS = [
-    "Afghanistan","Albania","Algeria","American Samoa","Andorra","Angola",
-    "Anguilla","Antarctica","Antigua And Barbuda","Argentina","Armenia",
-    "Aruba","Australia","Austria","Azerbaijan","Bahamas The","Bahrain",
-    "Bangladesh","Barbados","Belarus","Belgium","Belize","Benin","Bermuda",
-    "Bhutan","Bolivia","Bosnia and Herzegovina","Botswana","Bouvet Island",
-    "Brazil","British Indian Ocean Territory","Brunei","Bulgaria",
-    "Burkina Faso","Burundi","Cambodia","Cameroon","Canada","Cape Verde",
-    "Cayman Islands","Central African Republic","Chad","Chile","China",
-    "Christmas Island","Cocos (Keeling) Islands","Colombia","Comoros",
-    "Republic Of The Congo","Democratic Republic Of The Congo","Cook Islands",
-    "Costa Rica","Cote D'Ivoire (Ivory Coast)","Croatia (Hrvatska)","Cuba",
-    "Cyprus","Czech Republic","Denmark","Djibouti","Dominica",
-    "Dominican Republic","East Timor","Ecuador","Egypt","El Salvador",
-    "Equatorial Guinea","Eritrea","Estonia","Ethiopia",
-    "External Territories of Australia","Falkland Islands","Faroe Islands",
-    "Fiji Islands","Finland","France","French Guiana","French Polynesia",
-    "French Southern Territories","Gabon","Gambia The","Georgia","Germany",
-    "Ghana","Gibraltar","Greece","Greenland","Grenada","Guadeloupe","Guam",
-    "Guatemala","Guernsey and Alderney","Guinea","Guinea-Bissau","Guyana",
-    "Haiti","Heard and McDonald Islands","Honduras","Hong Kong S.A.R.",
-    "Hungary","Iceland","India","Indonesia","Iran","Iraq","Ireland","Israel",
-    "Italy","Jamaica","Japan","Jersey","Jordan","Kazakhstan","Kenya",
-    "Kiribati","Korea North","Korea South","Kuwait","Kyrgyzstan","Laos",
-    "Latvia","Lebanon","Lesotho","Liberia","Libya","Liechtenstein",
-    "Lithuania","Luxembourg","Macau S.A.R.","Macedonia","Madagascar",
-    "Malawi","Malaysia","Maldives","Mali","Malta","Marshall Islands",
-    "Martinique","Mauritania","Mauritius","Mayotte","Mexico","Micronesia",
-    "Moldova","Monaco","Mongolia","Montenegro","Montserrat","Morocco",
-    "Mozambique","Myanmar (Burma)","Namibia","Nauru","Nepal","Netherlands",
-    "Netherlands Antilles","New Caledonia","New Zealand","Nicaragua","Niger",
-    "Nigeria","Niue","Norfolk Island","Northern Mariana Islands","Norway",
-    "Oman","Pakistan","Palau","Palestinian Territories","Panama",
-    "Papua New Guinea","Paraguay","Peru","Philippines","Pitcairn Islands",
-    "Poland","Portugal","Puerto Rico","Qatar","Reunion","Romania","Russia",
-    "Rwanda","Saint Helena","Saint Kitts and Nevis","Saint Lucia",
-    "Saint Pierre and Miquelon","Saint Vincent and the Grenadines","Samoa",
-    "San Marino","Sao Tome and Principe","Saudi Arabia","Senegal","Serbia",
-    "Seychelles","Sierra Leone","Singapore","Slovakia","Slovenia",
-    "Solomon Islands","Somalia","South Africa",
-    "South Georgia and the South Sandwich Islands","Spain","Sri Lanka",
-    "Sudan","Suriname","Svalbard and Jan Mayen","Swaziland","Sweden",
-    "Switzerland","Syria","Taiwan","Tajikistan","Tanzania","Thailand",
-    "Timor-Leste (East Timor)","Togo","Tokelau","Tonga","Trinidad and Tobago",
-    "Tunisia","Turkey","Turkmenistan","Turks and Caicos Islands","Tuvalu",
-    "Uganda","Ukraine","United Arab Emirates","United Kingdom",
-    "United States","United States Minor Outlying Islands","Uruguay",
-    "Uzbekistan","Vanuatu","Vatican City","Venezuela","Vietnam",
-    "Virgin Islands, British","Virgin Islands, U.S.","Wallis and Futuna",
-    "Western Sahara","Yemen","Zambia","Zimbabwe",
-]
-
-# ── Standard options for review-stage input ───────────────────────
-SDG_OPTIONS = [
-    "No poverty (SDG 1)",
-    "Zero hunger (SDG 2)",
-    "Good health and well-being (SDG 3)",
-    "Quality education (SDG 4)",
-    "Gender equality (SDG 5)",
-    "Clean water and sanitation (SDG 6)",
-    "Affordable and clean energy (SDG 7)",
-    "Decent work and economic growth (SDG 8)",
-    "Industry, innovation and infrastructure (SDG 9)",
-    "Reduced inequalities (SDG 10)",
-    "Sustainable cities and communities (SDG 11)",
-    "Responsible consumption and production (SDG 12)",
-    "Climate action (SDG 13)",
-    "Life below water (SDG 14)",
-    "Life on land (SDG 15)",
-    "Peace, justice, and strong institutions (SDG 16)",
-    "Partnerships for the goals (SDG 17)",
-]
-
-MATURITY_STAGES = [
-    "Ideation",
-    "Validation",
-    "Pilot",
-    "Growth",
-    "Scale",
-    "Mature",
-]
+_SDG_SPLIT = re.compile(r"\s*;\s*")                # "a ; b;c" -> ["a", "b", "c"]
 
 # ── Helpers ────────────────────────────────────────────────────────
+SDG_SCORE_CUTOFF = 75                              # WRatio: 60 let "N/A" match "No poverty"
+SDG_PLACEHOLDERS = frozenset({"none", "unknown", "not specified", "not applicable"})
+
 def _match_sdgs(raw_list):
     matched = []
     for s in raw_list:
-        cands = difflib.get_close_matches(s, SDG_OPTIONS, n=1, cutoff=0.6)
-        if cands and cands[0] not in matched:
-            matched.append(cands[0])
+        # placeholders ("N/A", "Unknown") and fragments only ever match by accident
+        key = utils.default_process(s)
+        if len(key) < 4 or key in SDG_PLACEHOLDERS:
+            continue
+        best = process.extractOne(
+            s, SDG_OPTIONS, scorer=fuzz.WRatio,
+            processor=utils.default_process, score_cutoff=SDG_SCORE_CUTOFF,
+        )
+        if best and best[0] not in matched:
+            matched.append(best[0])
         if len(matched) >= 3:
             break
     return matched
 
-def extract_text_from_pdf(path: str) -> str:
-    doc = fitz.open(path)
-    return "\n".join(page.get_text() for page in doc)
-
-def extract_text_from_file(path: str) -> str:
-    ext = Path(path).suffix.lower()
-    if ext == ".pdf": return extract_text_from_pdf(path)
-    if ext == ".docx":
-        doc = Document(path)
-        return "\n".join(p.text for p in doc.paragraphs)
-    if ext == ".pptx":
-        prs = Presentation(path)
-        return "\n".join(
-            shape.text
-            for slide in prs.slides
-            for shape in slide.shapes
-            if hasattr(shape, "text")
+@st.cache_data(show_spinner=False)
+def _match_sdgs_cached(raw_tuple: tuple) -> list:
+    """_match_sdgs memoised on the raw strings (it is pure)."""
+    return _match_sdgs(list(raw_tuple))
+
+@st.cache_resource
+def _extract_slots() -> threading.BoundedSemaphore:
+    """
+    Caps concurrent parse processes across all sessions: CPU-bound parsing
+    runs outside the server so one large deck never stalls others on the GIL.
+    """
+    return threading.BoundedSemaphore(max(1, (os.cpu_count() or 2) - 1))
+
+def _extract_in_worker(slots: threading.BoundedSemaphore, suffix: str,
+                       data: Optional[bytes] = None, path: Optional[str] = None) -> Optional[str]:
+    """
+    Parse in its own killable process (extraction.extract_isolated). `slots`
+    is fetched by the caller on the script thread (worker threads have no
+    ScriptRunContext). EXTRACT_TIMEOUT starts once a slot is free, so
+    queueing behind other files never counts. None if the parse timed out.
+    """
+    with slots:
+        try:
+            return extract_isolated(suffix, data=data, path=path, timeout=EXTRACT_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            return None                 # subprocess.run has already killed it
+        except subprocess.CalledProcessError as e:
+            print("Text extraction failed:", e.stderr.decode("utf-8", "replace")[-1000:])
+            return ""
+        except OSError as e:            # no worker process could be started
+            print("Text extraction worker unavailable, parsing inline:", e)
+    return extract_text_from_file(path) if path else extract_text_from_bytes(data, suffix)
+
+def _extract_upload(upl, slots: threading.BoundedSemaphore) -> Optional[str]:
+    """
+    Extract text from a Streamlit upload: in memory up to IN_MEMORY_MAX_SIZE,
+    else via a temp file. None if extraction timed out.
+    """
+    suffix = Path(upl.name).suffix
+    if suffix.lower() not in TEXT_EXTENSIONS:
+        return ""
+    if upl.size <= IN_MEMORY_MAX_SIZE:
+        return _extract_in_worker(slots, suffix, data=upl.getvalue())
+    with tempfile.NamedTemporaryFile(delete=True, suffix=suffix) as tmp:
+        upl.seek(0)
+        shutil.copyfileobj(upl, tmp, length=COPY_CHUNK_SIZE)
+        tmp.flush()
+        return _extract_in_worker(slots, suffix, path=tmp.name)
+
+def _uploads_hash(files, proj: str) -> str:
+    """Fingerprint of the uploaded bytes + project name (buffers hashed without copying)."""
+    h = hashlib.sha256(proj.encode("utf-8"))
+    for f in files:
+        h.update(f.name.encode("utf-8"))
+        with f.getbuffer() as buf:
+            h.update(buf)
+    return h.hexdigest()
+
+@st.cache_data(show_spinner=False)
+def extract_text_cached(path: str, mtime: float, size: int) -> str:
+    """extract_text_from_file memoised on (path, mtime, size)."""
+    return extract_text_from_file(path)
+
+def _submission_text(fld: str) -> str:
+    """
+    Pitch text of a saved submission: _text.cache first, else parse every
+    upload, joined the way Generate does, and persist it to _text.cache.
+    """
+    base = os.path.join(UPLOAD_FOLDER, fld)
+    cache_path = os.path.join(base, TEXT_CACHE_FILE)
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as tf:
+            return tf.read()
+    with os.scandir(base) as it:
+        uploads = sorted(
+            (e for e in it if Path(e.name).suffix.lower() in TEXT_EXTENSIONS),
+            key=lambda e: e.name,
         )
-    if ext in (".xls", ".xlsx"):
-        try: return pd.read_excel(path).to_csv(index=False)
-        except: return ""
-    return ""
+    texts = [extract_text_cached(e.path, e.stat().st_mtime, e.stat().st_size) for e in uploads]
+    text = "\n\n".join(
+        f"### FILE {i}: {e.name}\n{t}"
+        for i, (e, t) in enumerate(zip(uploads, texts), 1) if t
+    )
+    if text:
+        _write_bytes(cache_path, text.encode("utf-8"))
+    return text
 
 def _parse_json_from_string(payload: str) -> Dict[str, Any]:
-    try: return json.loads(payload)
-    except:
+    """
+    Parse a summary_gpt.txt payload. The prose-wrapped fallback only matters
+    for legacy files written before the API was called in JSON mode.
+    """
+    try: return orjson.loads(payload)
+    except orjson.JSONDecodeError:
         if '{' in payload and '}' in payload:
             snippet = payload[payload.find('{'):payload.rfind('}')+1]
-            try: return json.loads(snippet)
-            except: pass
+            try: return orjson.loads(snippet)
+            except orjson.JSONDecodeError: pass
     return {}
 
-def summarize_project_with_gpt(full_text: str) -> Dict[str, Any]:
+@st.cache_resource
+def _gpt_encoding() -> Optional[tiktoken.Encoding]:
     """
-    Extract structured impact project fields from text using a direct JSON prompt.
-    Falls back missing keys to "Unknown".
+    None if the BPE file cannot be fetched (tiktoken downloads it on first
+    use; ship it via TIKTOKEN_CACHE_DIR for offline hosts).
     """
-    text = full_text[:15000]                       # keep context small enough
+    try:
+        return tiktoken.encoding_for_model(GPT_MODEL)
+    except Exception as e:
+        print("tiktoken unavailable, truncating by characters:", e)
+        return None
+
+def _token_len(text: str) -> int:
+    enc = _gpt_encoding()
+    return len(text) // CHARS_PER_TOKEN if enc is None else len(enc.encode(text, disallowed_special=()))
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut on real tokens; ~CHARS_PER_TOKEN characters each without tiktoken."""
+    enc = _gpt_encoding()
+    if enc is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return enc.decode(enc.encode(text, disallowed_special=())[:max_tokens])
+
+def _read_json(path: str) -> Any:
+    with open(path, "rb") as jf:
+        return orjson.loads(jf.read())
+
+def _write_bytes(path: str, data: bytes):
+    """
+    One write to a unique temp file beside `path`, then os.replace: readers
+    never see a partial file and concurrent writers never share a temp file.
+    The temp file is removed if anything fails.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)       # mkstemp creates 0600
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _write_json(path: str, obj: Any, indent: bool = False):
+    _write_bytes(path, orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0))
+
+def _gpt_cache_key(text: str) -> str:
+    return hashlib.sha256((GPT_MODEL + PROMPT_VERSION + text).encode("utf-8")).hexdigest()
+
+def _gpt_cache_read(key: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(GPT_CACHE_FOLDER, f"{key}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        return _read_json(path)
+    except Exception:
+        return None
+
+def _gpt_cache_write(key: str, summary: Dict[str, Any]):
+    """Write atomically so a crashed write never leaves a truncated entry."""
+    try:
+        _write_json(os.path.join(GPT_CACHE_FOLDER, f"{key}.json"), summary)
+    except Exception as e:
+        print("GPT cache write error:", e)
+
+def _embed_text(text: str) -> Optional[list]:
+    """Embed the pitch for the semantic cache; None if disabled or on error."""
+    if not SEMANTIC_CACHE.enabled:
+        return None
+    # same cl100k_base encoding as the chat model; cut to the embedding limit
+    text = _truncate_tokens(text, MAX_EMBED_TOKENS)
+    try:
+        resp = _openai_client().embeddings.create(model=EMBEDDING_MODEL, input=text)
+        return resp.data[0].embedding
+    except Exception as e:
+        print("Embedding error:", e)
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _summarize_cached(text: str, scope: str) -> Dict[str, Any]:
+    """
+    Disk-cached GPT call (temperature 0, so results are deterministic), with
+    st.cache_data in front: it survives reruns, unlike a module-level cache.
+    Near-duplicate reuse is limited to the same submitter (`scope`).
+    Raises on API errors so failures are never cached.
+    """
+    key = _gpt_cache_key(text)
+    cached = _gpt_cache_read(key)
+    if cached is not None:
+        return cached
+
+    # Near-duplicate pitch (e.g. a lightly edited deck): reuse its summary
+    embedding = _embed_text(text)
+    if embedding is not None:
+        try:
+            cached = SEMANTIC_CACHE.lookup(embedding, scope)
+        except Exception as e:
+            print("Semantic cache read error:", e)
+            cached = None
+        if cached is not None:
+            _gpt_cache_write(key, cached)
+            return cached
 
     system_prompt = (
         "You are an expert impact-investment analyst. "
-        "Return **only** a JSON object with these keys: "
+        "The pitch content may contain several documents, each introduced by a "
+        "'### FILE i: name' header, all describing one project. "
+        "Return **only** a single consolidated JSON object with these keys: "
         + ", ".join(AI_FIELDS) + "."
     )
     user_prompt = f"Pitch Content:\n{text}"
 
+    resp = _openai_client().chat.completions.create(
+        model=GPT_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user",   "content": user_prompt},
+        ],
+        temperature=0.0,
+        max_tokens=1500,
+        response_format={"type": "json_object"},
+    )
+    summary = orjson.loads(resp.choices[0].message.content)
+    if summary:
+        _gpt_cache_write(key, summary)
+        if embedding is not None:
+            try:
+                SEMANTIC_CACHE.store(embedding, summary, scope)
+            except Exception as e:
+                print("Semantic cache write error:", e)
+    return summary
+
+def _join_pitch(names: list, texts: list) -> str:
+    """
+    Join per-file texts under '### FILE i: name' headers. MAX_PITCH_TOKENS is
+    shared out first, so one long deck cannot crowd out the other files:
+    short files keep all their text and pass their unused share on.
+    """
+    docs = [(i, n, t) for i, (n, t) in enumerate(zip(names, texts), 1) if t]
+    headers = {i: f"### FILE {i}: {n}\n" for i, n, _ in docs}
+    budget, cut = MAX_PITCH_TOKENS - sum(_token_len(h) + 1 for h in headers.values()), {}
+    for k, (i, _, t) in enumerate(sorted(docs, key=lambda d: len(d[2]))):
+        share = budget // (len(docs) - k)
+        cut[i] = _truncate_tokens(t, share)
+        budget -= _token_len(cut[i])
+    return "\n\n".join(headers[i] + cut[i] for i, _, _ in docs)
+
+def summarize_project_with_gpt(full_text: str, submitter: str = "") -> Dict[str, Any]:
+    """
+    Extract structured impact project fields from text using a direct JSON prompt.
+    Falls back missing keys to "Unknown". `submitter` (contact e-mail) scopes
+    the near-duplicate cache.
+    """
+    # keep context small enough: cut on real tokens, not characters
+    text = _truncate_tokens(full_text, MAX_PITCH_TOKENS)
+
     try:
-        resp = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo-16k",             # or "gpt-4o-mini" if enabled
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user",   "content": user_prompt},
-            ],
-            temperature=0.0,
-            max_tokens=1500,
-        )
-        raw_output = resp.choices[0].message.content.strip()
-        summary = _parse_json_from_string(raw_output)
+        summary = _summarize_cached(text, submitter.strip().lower())   # st.cache_data hands out a copy
     except Exception as e:
         st.error(f"OpenAI API error: {e}")
         summary = {}
@@ -242,85 +401,319 @@ def render_summary_grid(summary: Dict[str, Any]):
         cols[i%3].markdown(f"**{field}**  \
 {val}")
 
+@st.cache_data(show_spinner=False)
+def _value_counts(values: pd.Series) -> pd.DataFrame:
+    counts = values.value_counts()
+    return pd.DataFrame({"label": counts.index, "count": counts.values})
+
+def _pie_chart(values: pd.Series, title: str) -> alt.Chart:
+    return alt.Chart(_value_counts(values), title=title).mark_arc().encode(
+        theta="count:Q",
+        color=alt.Color("label:N", title=None),
+        tooltip=["label:N", "count:Q"],
+    )
+
+# ── Helper: numeric parsing / review-form defaults ───────────────
+@st.cache_data(ttl=3600, show_spinner=False)
+def _today() -> date:
+    """Form-default date, refreshed hourly rather than on every rerun."""
+    return datetime.now().date()
+
+def _this_year() -> int:
+    return _today().year
+
+def _to_float(val, strip: str) -> float:
+    try:
+        return float(str(val).replace(strip, ""))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _to_int(val, default: int = 0) -> int:
+    s = str(val).replace(",", "")
+    return int(s) if s.isdigit() else default
+
+def _form_defaults(summ: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the numeric review-form defaults once, not on every rerun."""
+    return {
+        "rev": _to_int(summ.get("Last 12 months revenues (USD)", "")),
+        "som": _to_int(summ.get("Market size or SOM (USD)", "")),
+        "fn":  _to_int(summ.get("Financing need or round size (USD)", "")),
+        "by":  _to_int(summ.get("Breakeven year", ""), _this_year()),
+        "irr": _to_float(summ.get("Expected IRR (%)", ""), "%"),
+        "uop": _to_float(summ.get("Use of proceeds (%)", ""), "%"),
+    }
+
+# Review-form field -> widget key, in display order
+REVIEW_WIDGET_KEYS = {
+    "Project Name": "edit_Project Name",
+    "Business Model": "edit_Business Model",
+    "Maturity stage": "edit_Maturity stage",
+    "Core team": "edit_Core team",
+    "Impact Area": "edit_Impact Area",
+    "Key risks": "edit_Key risks",
+    "Barrier(s) to entry": "edit_Barrier(s) to entry",
+    "Last 12 months revenues (USD)": "edit_Last 12 months revenues",
+    "Market size or SOM (USD)": "edit_Market size or SOM",
+    "Financing need or round size (USD)": "edit_Financing need or round size",
+    "Breakeven year": "edit_Breakeven year",
+    "Expected IRR (%)": "edit_Expected IRR",
+    "Use of proceeds (%)": "edit_Use of proceeds",
+    "3 main SDGs targeted": "edit_3 main SDGs targeted",
+    "Problem": "edit_Problem",
+    "Solution": "edit_Solution",
+}
+
 # ── Helper: save the submission to disk ───────────────────────────
-def _save_submission(meta: dict, files, summary: dict):
+def _make_submission_dir(name: str) -> str:
+    """
+    Create a new submission folder with the normal permissions. os.mkdir is
+    atomic, so a name taken (same project, same second) gets a _2, _3… suffix.
+    """
+    fld, n = os.path.join(UPLOAD_FOLDER, name), 1
+    while True:
+        try:
+            os.mkdir(fld)
+            return fld
+        except FileExistsError:
+            n += 1
+            fld = os.path.join(UPLOAD_FOLDER, f"{name}_{n}")
+
+def _save_submission(meta: dict, staging_dir: Optional[str], summary: dict, text: str = ""):
     """
     Creates a timestamped folder in /submissions and writes:
-    • each uploaded file
+    • each uploaded file (renamed in from the stage-1 staging directory)
     • info.txt with human‑readable metadata
     • summary_gpt.txt containing the AI JSON
+    • _text.cache with the text extracted in stage 1 (if any)
     """
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_proj = meta["Project"].replace(" ", "_")
-    fld = os.path.join(UPLOAD_FOLDER, f"{safe_proj}_{ts}")
-    os.makedirs(fld, exist_ok=True)
-
-    # Save uploaded files
-    for upl in files:
-        fpath = os.path.join(fld, upl.name)
-        with open(fpath, "wb") as f:
-            f.write(upl.read())
+    fld = _make_submission_dir(f"{safe_proj}_{ts}")
+    # Uploaded files: renamed in from the staging directory (same
+    # filesystem, so no second copy of the bytes)
+    if staging_dir:
+        with os.scandir(staging_dir) as it:
+            for e in it:
+                os.replace(e.path, os.path.join(fld, e.name))
+        os.rmdir(staging_dir)
 
     # Write metadata
     meta_text = "\n".join(f"{k}: {v}" for k, v in meta.items()) + "\nNDA: Accepted\n"
-    with open(os.path.join(fld, "info.txt"), "w", encoding="utf-8") as mf:
-        mf.write(meta_text)
+    _write_bytes(os.path.join(fld, "info.txt"), meta_text.encode("utf-8"))
 
     # Save AI summary
-    with open(os.path.join(fld, "summary_gpt.txt"), "w", encoding="utf-8") as sf:
-        json.dump(summary, sf, ensure_ascii=False, indent=2)
+    _write_json(os.path.join(fld, "summary_gpt.txt"), summary, indent=True)
 
-    # Mirror submission folder to SharePoint
-    try:
-        _upload_to_sharepoint(fld, os.path.basename(fld))
-    except Exception as e:
-        print("SharePoint upload error:", e)
+    # Mirror submission folder to SharePoint in the background; the file
+    # list is taken now so credentials.json (written below) is never mirrored
+    fnames = [n for n in os.listdir(fld) if not n.endswith(".tmp")]
+    _sp_pool().submit(_upload_to_sharepoint, fld, os.path.basename(fld), fnames) \
+        .add_done_callback(lambda fut: fut.exception() and _log_sp_error(fld, fut.exception()))
 
     # Generate and save edit PIN for the entrepreneur
     pin = f"{random.randint(0, 9999):04d}"
-    cred_path = os.path.join(fld, "credentials.json")
-    with open(cred_path, "w", encoding="utf-8") as cf:
-        json.dump({"pin": pin}, cf)
+    _write_json(os.path.join(fld, "credentials.json"), {"pin": pin})
+
+    # Keep the extracted pitch text so it never has to be parsed again
+    if text:
+        _write_bytes(os.path.join(fld, TEXT_CACHE_FILE), text.encode("utf-8"))
     return fld, pin
 
 
+# ── Helper: stage uploads on disk between stage 1 and confirm ────
+STAGING_FOLDER = os.path.join(UPLOAD_FOLDER, ".staging")
+STAGING_MAX_AGE = 24 * 3600                        # abandoned staging dirs are purged after a day
+
+def _stage_uploads(files) -> str:
+    """
+    Stream uploads into a fresh staging directory (in parallel: file I/O
+    releases the GIL) so session_state only has to hold its path.
+    """
+    os.makedirs(STAGING_FOLDER, exist_ok=True)
+    _purge_stale_staging()
+    staging_dir = tempfile.mkdtemp(dir=STAGING_FOLDER)
+
+    def _write_upload(upl):
+        upl.seek(0)
+        with open(os.path.join(staging_dir, upl.name), "wb") as f:
+            shutil.copyfileobj(upl, f, length=COPY_CHUNK_SIZE)
+
+    with ThreadPoolExecutor(max_workers=min(8, len(files))) as ex:
+        list(ex.map(_write_upload, files))
+    return staging_dir
+
+def _purge_stale_staging():
+    cutoff = datetime.now().timestamp() - STAGING_MAX_AGE
+    with os.scandir(STAGING_FOLDER) as it:
+        for e in it:
+            if e.is_dir() and e.stat().st_mtime < cutoff:
+                shutil.rmtree(e.path, ignore_errors=True)
+
+def _discard_staging():
+    """Drop this session's staged uploads, if any."""
+    staging_dir = st.session_state.pop("form_staging", None)
+    if staging_dir:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
 # ── Helper: update an existing submission ────────────────────────
 def _update_submission(folder: str, meta: dict, summary: dict):
     """Overwrite metadata and summary in an existing submission folder."""
     base = os.path.join(UPLOAD_FOLDER, folder)
     # Overwrite metadata
     meta_text = "\n".join(f"{k}: {v}" for k, v in meta.items()) + "\nNDA: Accepted\n"
-    with open(os.path.join(base, "info.txt"), "w", encoding="utf-8") as mf:
-        mf.write(meta_text)
+    _write_bytes(os.path.join(base, "info.txt"), meta_text.encode("utf-8"))
     # Overwrite summary
-    with open(os.path.join(base, "summary_gpt.txt"), "w", encoding="utf-8") as sf:
-        json.dump(summary, sf, ensure_ascii=False, indent=2)
-
-def _upload_to_sharepoint(local_folder: str, project_folder: str):
+    _write_json(os.path.join(base, "summary_gpt.txt"), summary, indent=True)
+
+# ── Helper: load one submission for the admin dashboard ──────────
+def _read_info(meta_file: str) -> Dict[str, str]:
+    """Parse the `key: value` lines of an info.txt file."""
+    with open(meta_file, encoding="utf-8") as mf:
+        pairs = (line.split(":", 1) for line in mf if ":" in line)
+        return {k.strip(): v.strip() for k, v in pairs}
+
+# (path, mtime)-keyed copies for the edit flow: an edit bumps the mtime
+@st.cache_data(show_spinner=False)
+def _load_json_cached(path: str, mtime: float) -> Any:
+    return _read_json(path)
+
+@st.cache_data(show_spinner=False)
+def _read_info_cached(path: str, mtime: float) -> Dict[str, str]:
+    return _read_info(path)
+
+@st.cache_data(show_spinner=False)
+def _load_submission(fld: str, mtime: float) -> Dict[str, Any]:
     """
-    Upload all files from local_folder to a SharePoint document library,
-    creating a subfolder named project_folder.
+    Read info.txt, summary_gpt.txt and status.json of one submission folder.
+    `mtime` is only part of the cache key, so any edit invalidates the entry.
     """
-    # Pull SharePoint config from secrets
-    site_url      = st.secrets["SP_SITE_URL"]
-    client_id     = st.secrets["SP_CLIENT_ID"]
-    client_secret = st.secrets["SP_CLIENT_SECRET"]
-    library       = st.secrets["SP_DOC_LIBRARY"]  # e.g. "Shared Documents/ImpactSubmissions"
+    base = os.path.join(UPLOAD_FOLDER, fld)
+    meta_file = os.path.join(base, "info.txt")
+    info = _read_info(meta_file) if os.path.exists(meta_file) else {}
+
+    summary_dict = {}
+    sum_path = os.path.join(base, "summary_gpt.txt")
+    if os.path.exists(sum_path):
+        with open(sum_path, encoding="utf-8") as sf:
+            summary_dict = _parse_json_from_string(sf.read())
+
+    status = "Identified"
+    spath = os.path.join(base, "status.json")
+    if os.path.exists(spath):
+        try:
+            status = _read_json(spath).get("status", status)
+        except Exception:
+            pass
+
+    sdg_raw = summary_dict.get("3 main SDGs targeted", "")
+    if isinstance(sdg_raw, str):
+        sdg_list = [s for s in _SDG_SPLIT.split(sdg_raw.strip()) if s]
+    else:   # keep hashable strings only, for set-based filtering
+        sdg_list = [str(s) for s in sdg_raw] if isinstance(sdg_raw, list) else []
 
-    # Authenticate
-    creds = ClientCredential(client_id, client_secret)
-    ctx   = ClientContext(site_url).with_credentials(creds)
+    # Last update time
+    try:
+        last_update = datetime.fromtimestamp(os.path.getmtime(sum_path))
+    except OSError:
+        last_update = None
+
+    return {
+        "folder": fld,
+        "info": info,
+        "summary": summary_dict,
+        "status": status,
+        "sdgs": sdg_list,
+        "revenues": _to_float(summary_dict.get("Last 12 months revenues (USD)", "0"), ","),
+        "som": _to_float(summary_dict.get("Market size or SOM (USD)", "0"), ","),
+        "irr": _to_float(summary_dict.get("Expected IRR (%)", ""), "%"),
+        "last_update": last_update,
+    }
+
+def _sp_context() -> ClientContext:
+    """Authenticated SharePoint context built from secrets."""
+    creds = ClientCredential(st.secrets["SP_CLIENT_ID"], st.secrets["SP_CLIENT_SECRET"])
+    return ClientContext(st.secrets["SP_SITE_URL"]).with_credentials(creds)
+
+def _sp_upload_large(folder_url: str, path: str):
+    """Chunked upload session on its own context (contexts are not thread-safe)."""
+    folder = _sp_context().web.get_folder_by_server_relative_url(folder_url)
+    with open(path, "rb") as f:
+        folder.files.create_upload_session(f, SP_CHUNK_SIZE).execute_query()
+
+def _sp_upload_each(folder_url: str, items: list):
+    """
+    Fallback for a failed batch: one request per file, so one bad file no
+    longer drops the others. Raises afterwards if any file still failed.
+    """
+    failed = []
+    for fname, path in items:
+        try:
+            folder = _sp_context().web.get_folder_by_server_relative_url(folder_url)
+            with open(path, "rb") as f:
+                folder.upload_file(fname, f.read()).execute_query()
+        except Exception as e:
+            failed.append(f"{fname}: {e!r}")
+    if failed:
+        raise RuntimeError("SharePoint upload failed for " + "; ".join(failed))
+
+def _upload_to_sharepoint(local_folder: str, project_folder: str, fnames: Optional[list] = None):
+    """
+    Upload all files (or only `fnames`) from local_folder to a SharePoint
+    document library, creating a subfolder named project_folder.
+    """
+    library = st.secrets["SP_DOC_LIBRARY"]  # e.g. "Shared Documents/ImpactSubmissions"
+    ctx = _sp_context()
 
     # Create (or get) the project folder
     root_folder      = ctx.web.get_folder_by_server_relative_url(library)
     project_sp_folder = root_folder.add_folder(project_folder).execute_query()
 
-    # Upload each file in the local folder
-    for fname in os.listdir(local_folder):
+    small, large = [], []
+    for fname in (fnames if fnames is not None else os.listdir(local_folder)):
         path = os.path.join(local_folder, fname)
+        (large if os.path.getsize(path) > SP_CHUNK_SIZE else small).append((fname, path))
+
+    # Small files: queue every upload and flush them in a single batch request
+    # via ClientContext.execute_batch; per-file requests if the batch fails
+    folder_url = f"{library}/{project_folder}"
+    for fname, path in small:
         with open(path, "rb") as f:
-            content = f.read()
-        project_sp_folder.upload_file(fname, content).execute_query()
+            project_sp_folder.upload_file(fname, f.read())
+    if small:
+        try:
+            ctx.execute_batch()
+        except Exception as e:
+            print("SharePoint batch upload failed, retrying file by file:", e)
+            _sp_upload_each(folder_url, small)
+
+    # Large files: chunked upload sessions, in parallel
+    if large:
+        with ThreadPoolExecutor(max_workers=min(4, len(large))) as ex:
+            list(ex.map(lambda item: _sp_upload_large(folder_url, item[1]), large))
+
+# ── Helper: background SharePoint mirroring ─────────────────────
+SP_ERROR_LOG = os.path.join(UPLOAD_FOLDER, ".sharepoint_errors.log")
+
+@st.cache_resource
+def _sp_pool() -> ThreadPoolExecutor:
+    """One pool per server process (a plain global would be rebuilt on every rerun)."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="sharepoint")
+
+def _log_sp_error(local_folder: str, err: BaseException):
+    """Append failed mirrors to SP_ERROR_LOG so they can be retried later."""
+    print("SharePoint upload error:", err)
+    entry = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "folder": local_folder,
+        "error": repr(err),
+    }
+    with open(SP_ERROR_LOG, "ab") as lf:
+        lf.write(orjson.dumps(entry) + b"\n")
+
+# ── Helper: static NDA PDF, read once per process ────────────────
+@st.cache_resource
+def _load_nda_bytes(path: str, mtime: float) -> bytes:
+    return Path(path).read_bytes()
 
 # ── Helper: rerun compatible with all Streamlit versions ──────────
 def _rerun():
@@ -365,6 +758,13 @@ def email_admin(subject: str, body: str):
     except Exception as e:
         print("E‑mail error:", e)
 
+@st.cache_resource
+def _email_pool() -> ThreadPoolExecutor:
+    """Background SMTP sender; drained on interpreter exit so no alert is lost."""
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="email")
+    atexit.register(pool.shutdown)
+    return pool
+
 # ── Routing ───────────────────────────────────────────────────────
 is_admin = str(st.query_params.get("adminNCM", "")).lower() == "true"
 
@@ -381,8 +781,7 @@ if is_admin:
     sector_filter = st.sidebar.multiselect("Sector", SECTOR_OPTIONS)
     main_country_filter = st.sidebar.text_input("Main country of current operations contains")
     sdg_filter = st.sidebar.multiselect("3 main SDGs targeted", SDG_OPTIONS)
-    geography_filter = st.sidebar.multiselect("Region of operation", [
-        "Global", "Western Economies", "Africa", "Asia", "SEA", "Latam"])
+    geography_filter = st.sidebar.multiselect("Region of operation", REGION_OPTIONS)
     maturity_filter = st.sidebar.multiselect("Maturity stage", MATURITY_STAGES)
 
     st.sidebar.markdown("---")
@@ -396,92 +795,70 @@ if is_admin:
     min_irr = st.sidebar.number_input("Min expected IRR (%)", min_value=0.0, max_value=100.0, value=0.0, step=0.1)
     max_irr = st.sidebar.number_input("Max expected IRR (%)", min_value=0.0, max_value=100.0, value=100.0, step=0.1)
 
-    folders = [f for f in os.listdir(UPLOAD_FOLDER) if os.path.isdir(os.path.join(UPLOAD_FOLDER, f))]
-    if not folders:
+    # Selected options as frozensets: O(1) membership in the filters below
+    sector_set = frozenset(sector_filter)
+    sdg_set = frozenset(sdg_filter)
+    geo_set = frozenset(geography_filter)
+    maturity_set = frozenset(maturity_filter)
+
+    # One scandir pass: DirEntry.is_dir() needs no extra stat call
+    with os.scandir(UPLOAD_FOLDER) as it:
+        entries = sorted(
+            (e for e in it if not e.name.startswith(".") and e.is_dir()),
+            key=lambda e: e.name,
+        )
+    # Parse every submission exactly once per rerun; charts, expanders and
+    # export are all driven from this list. The folder mtime is the cache
+    # key: every write goes through os.replace, which updates it.
+    submissions = [
+        _load_submission(e.name, e.stat().st_mtime)
+        for e in entries
+    ]
+
+    if not entries:
         st.info("No submissions yet.")
     else:
 
-        # Build filtered records for dashboard metrics and charts
-        records = []
-        for fld in folders:
-            base = os.path.join(UPLOAD_FOLDER, fld)
-            # Read metadata
-            info = {}
-            meta_file = os.path.join(base, "info.txt")
-            if os.path.exists(meta_file):
-                for line in open(meta_file).read().splitlines():
-                    if ":" in line:
-                        k, v = line.split(":", 1)
-                        info[k.strip()] = v.strip()
-            # Read summary
-            sum_path = os.path.join(base, "summary_gpt.txt")
-            summary_dict = _parse_json_from_string(open(sum_path).read()) if os.path.exists(sum_path) else {}
-            # Read status
-            status = "Identified"
-            spath = os.path.join(base, "status.json")
-            if os.path.exists(spath):
-                try:
-                    status = json.load(open(spath)).get("status", status)
-                except:
-                    pass
-            # Apply same filters as for display
-            if hq_filter and hq_filter.lower() not in info.get("Country HQ", "").lower():
-                continue
-            if sector_filter and info.get("Sector", "") not in sector_filter:
-                continue
-            if main_country_filter and main_country_filter.lower() not in summary_dict.get("Main country of current operations", "").lower():
-                continue
-            sdg_raw = summary_dict.get("3 main SDGs targeted", "")
-            sdg_list = [s.strip() for s in sdg_raw.split(";")] if isinstance(sdg_raw, str) else sdg_raw
-            if sdg_filter and any(s not in sdg_list for s in sdg_filter):
-                continue
-            if geography_filter and summary_dict.get("Region of operation", "") not in geography_filter:
-                continue
-            if maturity_filter and summary_dict.get("Maturity stage", "") not in maturity_filter:
-                continue
-            # Numeric filters
-            try:
-                rev_val = float(summary_dict.get("Last 12 months revenues (USD)", "0").replace(",", ""))
-            except:
-                rev_val = 0.0
-            if rev_val < min_rev or rev_val > max_rev:
-                continue
-            try:
-                som_val = float(summary_dict.get("Market size or SOM (USD)", "0").replace(",", ""))
-            except:
-                som_val = 0.0
-            if som_val < min_som or som_val > max_som:
-                continue
-            try:
-                irr_val = float(summary_dict.get("Expected IRR (%)", "").replace("%", ""))
-            except:
-                irr_val = 0.0
-            if irr_val < min_irr or irr_val > max_irr:
-                continue
-            # Last update time
-            try:
-                mtime = os.path.getmtime(os.path.join(base, "summary_gpt.txt"))
-                last_update = datetime.fromtimestamp(mtime)
-            except:
-                last_update = None
-            records.append({
-                "Project": info.get("Project", fld),
-                "Email": info.get("Email", ""),
-                "Country HQ": info.get("Country HQ", ""),
-                "Sector": info.get("Sector", ""),
-                "Main country": summary_dict.get("Main country of current operations", ""),
-                "SDGs": sdg_list,
-                "Region of operation": summary_dict.get("Region of operation", ""),
-                "Maturity": summary_dict.get("Maturity stage", ""),
-                "Status": status,
-                "Revenues": rev_val,
-                "SOM": som_val,
-                "IRR": irr_val,
-                "LastUpdate": last_update,
-            })
+        # One row per submission; filters are applied as vectorized masks
+        df_all = pd.DataFrame([{
+            "Project": sub["info"].get("Project", sub["folder"]),
+            "Email": sub["info"].get("Email", ""),
+            "Country HQ": sub["info"].get("Country HQ", ""),
+            "Sector": sub["info"].get("Sector", ""),
+            "Main country": str(sub["summary"].get("Main country of current operations", "")),
+            "SDGs": sub["sdgs"],
+            "Region of operation": str(sub["summary"].get("Region of operation", "")),
+            "Maturity": str(sub["summary"].get("Maturity stage", "")),
+            "Status": sub["status"],
+            "Revenues": sub["revenues"],
+            "SOM": sub["som"],
+            "IRR": sub["irr"],
+            "LastUpdate": sub["last_update"],
+        } for sub in submissions])
+
+        m = pd.Series(True, index=df_all.index)
+        if hq_filter:
+            m &= df_all["Country HQ"].str.contains(hq_filter, case=False, regex=False, na=False)
+        if sector_set:
+            m &= df_all["Sector"].isin(sector_set)
+        if main_country_filter:
+            m &= df_all["Main country"].str.contains(main_country_filter, case=False, regex=False, na=False)
+        if sdg_set:
+            m &= df_all["SDGs"].map(sdg_set.issubset)
+        if geo_set:
+            m &= df_all["Region of operation"].isin(geo_set)
+        if maturity_set:
+            m &= df_all["Maturity"].isin(maturity_set)
+        # Numeric filters
+        m &= df_all["Revenues"].between(min_rev, max_rev)
+        m &= df_all["SOM"].between(min_som, max_som)
+        m &= df_all["IRR"].between(min_irr, max_irr)
+
+        df = df_all[m]
+        filtered = [submissions[i] for i in df.index]
+
         # Display dashboard metrics and charts
-        if records:
-            df = pd.DataFrame(records)
+        if filtered:
             st.subheader("Dashboard Overview")
             # Key metrics at a glance
             col1, col2, col3, col4 = st.columns(4)
@@ -491,121 +868,23 @@ if is_admin:
             col4.metric("🌐 Unique Sectors", df["Sector"].nunique())
             st.markdown("---")  # separator before charts
             # Last project update
-            latest = max(records, key=lambda x: x["LastUpdate"] or datetime.min)
-            st.markdown(f"**Last project update:** {latest['LastUpdate'].strftime('%Y-%m-%d %H:%M:%S')} by {latest['Email']}")
+            latest = max(filtered, key=lambda sub: sub["last_update"] or datetime.min)
+            st.markdown(f"**Last project update:** {latest['last_update'].strftime('%Y-%m-%d %H:%M:%S')} by {latest['info'].get('Email', '')}")
             # Pie charts with titles
             col1, col2, col3 = st.columns(3)
 
-            # Status distribution pie
-            fig1, ax1 = plt.subplots(figsize=(4, 4))
-            df["Status"].value_counts().plot.pie(
-                autopct="%1.1f%%", ax=ax1, startangle=90
-            )
-            ax1.set_ylabel("")  # remove default ylabel
-            ax1.set_title("By Status")
-            col1.pyplot(fig1)
-
-            # Region of operation distribution pie
-            fig2, ax2 = plt.subplots(figsize=(4, 4))
-            df["Region of operation"].value_counts().plot.pie(
-                autopct="%1.1f%%", ax=ax2, startangle=90
-            )
-            ax2.set_ylabel("")
-            ax2.set_title("By Region")
-            col2.pyplot(fig2)
-
-            # Sector distribution pie
-            fig3, ax3 = plt.subplots(figsize=(4, 4))
-            df["Sector"].value_counts().plot.pie(
-                autopct="%1.1f%%", ax=ax3, startangle=90
-            )
-            ax3.set_ylabel("")
-            ax3.set_title("By Sector")
-            col3.pyplot(fig3)
+            # Status / region / sector distribution pies (rendered client-side)
+            col1.altair_chart(_pie_chart(df["Status"], "By Status"), width="stretch")
+            col2.altair_chart(_pie_chart(df["Region of operation"], "By Region"), width="stretch")
+            col3.altair_chart(_pie_chart(df["Sector"], "By Sector"), width="stretch")
             # Histogram per sector
             st.subheader("Submissions per Sector")
             st.bar_chart(df["Sector"].value_counts())
 
-        for fld in sorted(folders):
+        for sub in filtered:
+            fld, info, summary_dict = sub["folder"], sub["info"], sub["summary"]
             base = os.path.join(UPLOAD_FOLDER, fld)
-            info = {}
-            meta_file = os.path.join(base, "info.txt")
-            if os.path.exists(meta_file):
-                with open(meta_file) as mf:
-                    for line in mf.read().splitlines():
-                        if ":" in line:
-                            k, v = line.split(":", 1)
-                            info[k.strip()] = v.strip()
-
-            # Apply Headquarters country filter
-            if hq_filter:
-                # hq_filter may be string or list
-                if isinstance(hq_filter, list):
-                    # treat as any-of: require at least one selected item in the field
-                    if not any(item.lower() in info.get("Country HQ", "").lower() for item in hq_filter):
-                        continue
-                else:
-                    if hq_filter.lower() not in info.get("Country HQ", "").lower():
-                        continue
-            if sector_filter and info.get("Sector", "") not in sector_filter:
-                continue
-
-            sum_path = os.path.join(base, "summary_gpt.txt")
-            # Parse AI summary early for summary-based filters
-            summary_dict = _parse_json_from_string(open(sum_path).read()) if os.path.exists(sum_path) else {}
-
-            # Apply Main country of current operations filter
-            if main_country_filter:
-                if isinstance(main_country_filter, list):
-                    if not any(item.lower() in summary_dict.get("Main country of current operations", "").lower() for item in main_country_filter):
-                        continue
-                else:
-                    if main_country_filter.lower() not in summary_dict.get("Main country of current operations", "").lower():
-                        continue
-
-            # Apply SDG filter: fuzzy-matched summary list
-            sdg_raw = summary_dict.get("3 main SDGs targeted", "")
-            sdg_list = [s.strip() for s in sdg_raw.split(";")] if isinstance(sdg_raw, str) else sdg_raw
-            if sdg_filter and any(s not in sdg_list for s in sdg_filter):
-                continue
-
-            # Apply geography filter
-            if geography_filter and summary_dict.get("Region of operation", "") not in geography_filter:
-                continue
-
-            # Apply maturity filter
-            if maturity_filter and summary_dict.get("Maturity stage", "") not in maturity_filter:
-                continue
-
-            # Apply numeric filters
-            try:
-                rev_val = float(summary_dict.get("Last 12 months revenues (USD)", "0").replace(",", ""))
-            except:
-                rev_val = 0.0
-            if rev_val < min_rev or rev_val > max_rev:
-                continue
-
-            try:
-                som_val = float(summary_dict.get("Market size or SOM (USD)", "0").replace(",", ""))
-            except:
-                som_val = 0.0
-            if som_val < min_som or som_val > max_som:
-                continue
-
-            try:
-                irr_val = float(summary_dict.get("Expected IRR (%)", "").replace("%", ""))
-            except:
-                irr_val = 0.0
-            if irr_val < min_irr or irr_val > max_irr:
-                continue
-
-            status_path = os.path.join(base, "status.json")
-            status_val = "Identified"
-            if os.path.exists(status_path):
-                try:
-                    status_val = json.load(open(status_path)).get("status", status_val)
-                except Exception:
-                    pass
+            status_val = sub["status"]
 
             with st.expander(f"{info.get('Project', fld)}"):
                 st.markdown(f"**Project Name:** {info.get('Project', '–')}")
@@ -616,6 +895,13 @@ if is_admin:
                 st.markdown("**AI Summary:**")
                 render_summary_grid(summary_dict)
 
+                # read (or parse) the pitch text only when asked for
+                if st.checkbox("Show extracted pitch text", key=f"text_{fld}"):
+                    st.text_area(
+                        "Pitch text", _submission_text(fld),
+                        height=300, disabled=True, key=f"pitch_{fld}",
+                    )
+
                 pdfs = [p for p in os.listdir(base) if p.lower().endswith(".pdf")]
                 if pdfs:
                     pfile = pdfs[0]
@@ -631,34 +917,23 @@ if is_admin:
                 option = st.selectbox(
                     "Due Diligence / Operations stage",
                     REVIEW_STAGES,
-                    index=REVIEW_STAGES.index(status_val) if status_val in REVIEW_STAGES else 0,
+                    index=REVIEW_STAGES_IDX.get(status_val, 0),
                     key=f"stage_{fld}",
                 )
                 if st.button("Save Status", key=f"save_{fld}"):
-                    with open(status_path, "w") as sf:
-                        json.dump({"status": option}, sf)
+                    _write_json(os.path.join(base, "status.json"), {"status": option})
                     st.success("Status updated!")
 
     # ── EXPORT ───────────────────────────────────────────────
     rows = []
-    for fld in folders:
-        base = os.path.join(UPLOAD_FOLDER, fld)
-        info = {}
-        imeta = os.path.join(base, "info.txt")
-        if os.path.exists(imeta):
-            with open(imeta) as mf:
-                for line in mf.read().splitlines():
-                    if ":" in line:
-                        k, v = line.split(":", 1)
-                        info[k.strip()] = v.strip()
-        status_val = json.load(open(os.path.join(base, "status.json")))['status'] if os.path.exists(os.path.join(base, "status.json")) else "Identified"
-        parsed = _parse_json_from_string(open(os.path.join(base, "summary_gpt.txt")).read()) if os.path.exists(os.path.join(base, "summary_gpt.txt")) else {}
+    for sub in submissions:
+        info, parsed = sub["info"], sub["summary"]
         row = {f: "" for f in AI_FIELDS}
         row.update({
-            "Project": info.get("Project", fld),
+            "Project": info.get("Project", sub["folder"]),
             "Country HQ": info.get("Country HQ", ""),    # use HQ country
             "Sector": info.get("Sector", ""),
-            "Status": status_val,
+            "Status": sub["status"],
             "Email": info.get("Email", ""),
         })
         for k, v in parsed.items():
@@ -690,29 +965,29 @@ else:
         if st.button("Load Submission"):
             cred_file = os.path.join(UPLOAD_FOLDER, eid or "", "credentials.json")
             if os.path.exists(cred_file):
-                creds = json.load(open(cred_file))
-                if creds.get("pin") == epin:
+                creds = _load_json_cached(cred_file, os.path.getmtime(cred_file))
+                # constant-time compare (bytes: compare_digest rejects non-ASCII str)
+                if hmac.compare_digest(str(creds.get("pin", "")).encode(), epin.encode()):
                     # load metadata & summary into session_state as before
                     base = os.path.join(UPLOAD_FOLDER, eid)
-                    info = {}
-                    for line in open(os.path.join(base, "info.txt")).read().splitlines():
-                        if ":" in line:
-                            k, v = line.split(":",1)
-                            info[k.strip()] = v.strip()
+                    meta_file = os.path.join(base, "info.txt")
+                    info = _read_info_cached(meta_file, os.path.getmtime(meta_file))
                     summary = {}
-                    try:
-                        summary = json.loads(open(os.path.join(base, "summary_gpt.txt")).read())
-                    except:
-                        pass
+                    sum_path = os.path.join(base, "summary_gpt.txt")
+                    if os.path.exists(sum_path) and os.path.getsize(sum_path) > 0:
+                        try:
+                            summary = _load_json_cached(sum_path, os.path.getmtime(sum_path))
+                        except orjson.JSONDecodeError:
+                            pass        # corrupt file: start from an empty summary
                     st.session_state.form_meta = {
                         "Project": info.get("Project",""),
-                        "Incorporation date": info.get("Incorporation date", datetime.now().date()),
+                        "Incorporation date": info.get("Incorporation date", _today()),
                         "Country HQ": info.get("Country HQ",""),
                         "Sector": info.get("Sector",""),
                         "Email": info.get("Email",""),
                     }
-                    st.session_state.form_files = []
                     st.session_state.form_summ = summary
+                    st.session_state.form_defaults = _form_defaults(summary)
                     st.session_state.edit_folder = eid
                     st.session_state.stage = "review"
                     _rerun()
@@ -730,14 +1005,13 @@ else:
         # Mutual NDA download button (outside the form)
         nda_path = Path(__file__).with_name("Mutual agreement.pdf")
         if nda_path.exists():
-            with nda_path.open("rb") as nda_file:
-                st.download_button(
-                    label="Download Mutual NDA (PDF)",
-                    data=nda_file.read(),
-                    file_name="Mutual_agreement.pdf",
-                    mime="application/pdf",
-                    key="nda_download",
-                )
+            st.download_button(
+                label="Download Mutual NDA (PDF)",
+                data=_load_nda_bytes(str(nda_path), nda_path.stat().st_mtime),
+                file_name="Mutual_agreement.pdf",
+                mime="application/pdf",
+                key="nda_download",
+            )
         else:
             st.warning("NDA PDF not found.")
 
@@ -765,18 +1039,31 @@ else:
                 st.warning("Max 5 files.")
                 st.stop()
 
-            # run AI on first uploaded file (PDF, DOCX, PPTX, XLSX)
-            from tempfile import NamedTemporaryFile
-
-            first_file = files[0] if files else None
-            summary = {}
-            if first_file:
-                suffix = Path(first_file.name).suffix
-                with NamedTemporaryFile(delete=True, suffix=suffix) as tmp:
-                    tmp.write(first_file.read())
-                    tmp.flush()
-                    text = extract_text_from_file(tmp.name)
-                summary = summarize_project_with_gpt(text)
+            # same files + project as the last generation (double click,
+            # going back): reuse that result instead of re-running the AI
+            upload_hash = _uploads_hash(files, proj)
+            if upload_hash == st.session_state.get("last_summary_hash"):
+                summary = st.session_state.last_summary
+                text = st.session_state.last_summary_text
+            else:
+                # run AI on every uploaded file (PDF, DOCX, PPTX, XLSX); extraction
+                # runs in parallel so N files cost ~max rather than sum of latencies,
+                # then all documents go to GPT in one call
+                summary = {}
+                slots = _extract_slots()
+                with ThreadPoolExecutor(max_workers=min(len(files), 5)) as ex:
+                    texts = list(ex.map(lambda f: _extract_upload(f, slots), files))
+                timed_out = [f.name for f, t in zip(files, texts) if t is None]
+                if timed_out:
+                    st.warning("Text extraction timed out for: " + ", ".join(timed_out))
+                text = _join_pitch([f.name for f in files], texts)
+                if text:
+                    summary = summarize_project_with_gpt(text, email)
+                # failed runs (timeouts, everything "Unknown") stay retryable
+                if not timed_out and any(v != "Unknown" for v in summary.values()):
+                    st.session_state.last_summary_hash = upload_hash
+                    st.session_state.last_summary = summary
+                    st.session_state.last_summary_text = text
 
             # stash in session state
             st.session_state.form_meta  = {
@@ -786,8 +1073,13 @@ else:
                 "Sector": sector,
                 "Email": email,
             }
-            st.session_state.form_files = files
+            # spool uploads to disk; session_state keeps only their paths
+            _discard_staging()
+            staging_dir = _stage_uploads(files)
+            st.session_state.form_staging = staging_dir
+            st.session_state.form_text  = text
             st.session_state.form_summ  = summary or {k: "Unknown" for k in AI_FIELDS}
+            st.session_state.form_defaults = _form_defaults(st.session_state.form_summ)
             st.session_state.stage = "review"
             _rerun()
 
@@ -795,152 +1087,132 @@ else:
     if st.session_state.stage == "review":
         # ── Review & edit AI-generated summary with typed inputs
         st.header("Review & edit AI-generated summary")
-        edited = {}
+        # Widgets persist their values via key=; the edited dict is only
+        # assembled on Confirm & Submit (see REVIEW_WIDGET_KEYS)
 
         # Project Name and Business Model: free text
-        edited["Project Name"] = st.text_input(
+        st.text_input(
             "Project Name",
             value=st.session_state.form_summ.get("Project Name", ""),
-            key="edit_Project Name",
+            key=REVIEW_WIDGET_KEYS["Project Name"],
         )
-        edited["Business Model"] = st.text_input(
+        st.text_input(
             "Business Model",
             value=st.session_state.form_summ.get("Business Model", ""),
-            key="edit_Business Model",
+            key=REVIEW_WIDGET_KEYS["Business Model"],
         )
 
         # Maturity stage: select from standard list with fallback for custom values
         # Graceful fallback if AI returned a custom stage not in list
-        ms_val = st.session_state.form_summ.get("Maturity stage", "")
-        default_index = MATURITY_STAGES.index(ms_val) if ms_val in MATURITY_STAGES else 0
-        edited["Maturity stage"] = st.selectbox(
+        default_index = MATURITY_STAGES_IDX.get(str(st.session_state.form_summ.get("Maturity stage", "")), 0)
+        st.selectbox(
             "Maturity stage",
             MATURITY_STAGES,
             index=default_index,
-            key="edit_Maturity stage",
+            key=REVIEW_WIDGET_KEYS["Maturity stage"],
         )
 
         # Core Team, Impact Area, Key risks, Barrier(s) to entry
         for field in ["Core team", "Impact Area", "Key risks", "Barrier(s) to entry"]:
-            edited[field] = st.text_input(
+            st.text_input(
                 field,
                 value=st.session_state.form_summ.get(field, ""),
-                key=f"edit_{field}",
+                key=REVIEW_WIDGET_KEYS[field],
             )
 
         # Numeric fields: integer / float inputs
+        # (defaults are parsed once, when the review stage is entered)
+        defaults = st.session_state.form_defaults
         # Last 12 months revenues
-        rev_val_raw = st.session_state.form_summ.get("Last 12 months revenues (USD)", "")
-        rev_raw = str(rev_val_raw).replace(",", "")
-        rev_default = int(rev_raw) if rev_raw.isdigit() else 0
-        edited["Last 12 months revenues (USD)"] = st.number_input(
+        st.number_input(
             "Last 12 months revenues (USD)",
             min_value=0,
-            value=rev_default,
+            value=defaults["rev"],
             step=1,
             format="%d",
-            key="edit_Last 12 months revenues",
+            key=REVIEW_WIDGET_KEYS["Last 12 months revenues (USD)"],
         )
 
         # Market size or SOM
-        som_val_raw = st.session_state.form_summ.get("Market size or SOM (USD)", "")
-        som_raw = str(som_val_raw).replace(",", "")
-        som_default = int(som_raw) if som_raw.isdigit() else 0
-        edited["Market size or SOM (USD)"] = st.number_input(
+        st.number_input(
             "Market size or SOM (USD)",
             min_value=0,
-            value=som_default,
+            value=defaults["som"],
             step=1,
             format="%d",
-            key="edit_Market size or SOM",
+            key=REVIEW_WIDGET_KEYS["Market size or SOM (USD)"],
         )
 
         # Financing need or round size
-        fn_val_raw = st.session_state.form_summ.get("Financing need or round size (USD)", "")
-        fn_raw = str(fn_val_raw).replace(",", "")
-        fn_default = int(fn_raw) if fn_raw.isdigit() else 0
-        edited["Financing need or round size (USD)"] = st.number_input(
+        st.number_input(
             "Financing need or round size (USD)",
             min_value=0,
-            value=fn_default,
+            value=defaults["fn"],
             step=1,
             format="%d",
-            key="edit_Financing need or round size",
+            key=REVIEW_WIDGET_KEYS["Financing need or round size (USD)"],
         )
 
         # Breakeven year
-        by_raw = st.session_state.form_summ.get("Breakeven year", "")
-        by_default = int(by_raw) if str(by_raw).isdigit() else datetime.now().year
-        edited["Breakeven year"] = st.number_input(
+        st.number_input(
             "Breakeven year",
             min_value=1900,
             max_value=2100,
-            value=by_default,
+            value=defaults["by"],
             step=1,
-            key="edit_Breakeven year",
+            key=REVIEW_WIDGET_KEYS["Breakeven year"],
         )
 
         # Expected IRR as percentage
-        irr_val_raw = st.session_state.form_summ.get("Expected IRR (%)", "")
-        irr_raw = str(irr_val_raw).replace("%", "")
-        try:
-            irr_default = float(irr_raw)
-        except:
-            irr_default = 0.0
-        edited["Expected IRR (%)"] = st.number_input(
+        st.number_input(
             "Expected IRR (%)",
             min_value=0.0,
             max_value=100.0,
-            value=irr_default,
+            value=defaults["irr"],
             step=0.1,
             format="%.2f",
-            key="edit_Expected IRR",
+            key=REVIEW_WIDGET_KEYS["Expected IRR (%)"],
         )
 
         # Use of proceeds
-        uop_val_raw = st.session_state.form_summ.get("Use of proceeds (%)", "")
-        uop_raw = str(uop_val_raw).replace("%", "")
-        try:
-            uop_default = float(uop_raw)
-        except:
-            uop_default = 0.0
-        edited["Use of proceeds (%)"] = st.number_input(
+        st.number_input(
             "Use of proceeds (%)",
             min_value=0.0,
             max_value=100.0,
-            value=uop_default,
+            value=defaults["uop"],
             step=1.0,
             format="%.1f",
-            key="edit_Use of proceeds",
+            key=REVIEW_WIDGET_KEYS["Use of proceeds (%)"],
         )
 
         # SDGs targeted: up to 3 selections, with fallback for non-standard values
         raw_sdgs = st.session_state.form_summ.get("3 main SDGs targeted", "")
         if isinstance(raw_sdgs, str):
-            raw_list = [s.strip() for s in raw_sdgs.split(";") if s.strip()]
+            raw_list = [s for s in _SDG_SPLIT.split(raw_sdgs.strip()) if s]
         else:
             raw_list = raw_sdgs
 
         # Fuzzy-match AI output to canonical SDG options
-        default_sdgs = _match_sdgs(raw_list)
+        default_sdgs = _match_sdgs_cached(tuple(raw_list))
 
-        edited["3 main SDGs targeted"] = st.multiselect(
+        st.multiselect(
             "3 main SDGs targeted",
             SDG_OPTIONS,
             default=default_sdgs,
             max_selections=3,
-            key="edit_3 main SDGs targeted",
+            key=REVIEW_WIDGET_KEYS["3 main SDGs targeted"],
         )
 
         # Other free-text fields
         for field in ["Problem", "Solution"]:
-            edited[field] = st.text_area(
+            st.text_area(
                 field,
                 value=st.session_state.form_summ.get(field, ""),
-                key=f"edit_{field}",
+                key=REVIEW_WIDGET_KEYS[field],
             )
 
         if st.button("✅ Confirm & Submit"):
+            edited = {field: st.session_state[key] for field, key in REVIEW_WIDGET_KEYS.items()}
             if "edit_folder" in st.session_state:
                 _update_submission(
                     st.session_state.edit_folder,
@@ -950,10 +1222,16 @@ else:
                 fld = os.path.join(UPLOAD_FOLDER, st.session_state.edit_folder)
                 token = None
             else:
+                staging_dir = st.session_state.get("form_staging")
+                if not (staging_dir and os.path.isdir(staging_dir)):
+                    # staged uploads purged (abandoned for over a day) or lost
+                    st.error("Your uploaded files have expired. Please start over and upload them again.")
+                    st.stop()
                 fld, token = _save_submission(
                     st.session_state.form_meta,
-                    st.session_state.form_files,
+                    st.session_state.pop("form_staging"),
                     edited,
+                    st.session_state.get("form_text", ""),
                 )
                 st.session_state._last_submission_token = token
             # Send email alert
@@ -964,7 +1242,7 @@ else:
                 f"Country: {st.session_state.form_meta['Country HQ']}\n"
                 f"Uploaded: {datetime.now().isoformat(timespec='seconds')}"
             )
-            email_admin(subject, body)
+            _email_pool().submit(email_admin, subject, body)   # SMTP off the critical path
             st.session_state.submitted_details = edited
             # Save for next stage
             st.session_state._last_submission_fld = fld
@@ -979,18 +1257,19 @@ else:
         st.write("We will notify you at ", st.session_state.form_meta.get("Email"), " once we have an update.")
         # Optionally display a summary of what was submitted:
         st.subheader("Your submitted details:")
-        for field, val in st.session_state.submitted_details.items():
-            st.markdown(f"- **{field}:** {val}")
+        st.markdown("\n".join(
+            f"- **{field}:** {val}" for field, val in st.session_state.submitted_details.items()
+        ))
         # Display Project ID and PIN on new submissions
         if not st.session_state.get("edit_folder"):
             st.subheader("Your Project ID and PIN:")
             proj_id = os.path.basename(st.session_state._last_submission_fld)
             pin = st.session_state._last_submission_token
-            st.markdown(f"- **Project ID:** `{proj_id}`")
-            st.markdown(f"- **PIN:** `{pin}`")
+            st.markdown(f"- **Project ID:** `{proj_id}`\n- **PIN:** `{pin}`")
             st.info("Please save your Project ID and PIN to edit your submission later.")
         # Offer a “Start over” button to clear state
         if st.button("Submit another project"):
-            for k in ("stage", "form_meta", "form_files", "form_summ", "submitted_details", "_last_submission_fld", "_last_submission_token", "edit_folder"):
+            _discard_staging()
+            for k in ("stage", "form_meta", "form_text", "form_summ", "form_defaults", "submitted_details", "_last_submission_fld", "_last_submission_token", "edit_folder"):
                 st.session_state.pop(k, None)
             _rerun()
@@ -0,0 +1,84 @@
+"""Option lists and limits shared by the app and the extraction workers."""
+
+# GPT pitch budget; extraction stops once it has ~this much text
+MAX_PITCH_TOKENS = 12000
+CHARS_PER_TOKEN = 4                                # rough English average
+
+REVIEW_STAGES = (
+    "Identified", "Intro call", "NDA and Deck", "Financials", "4-pager",
+    "IC1", "IC2", "Local DD", "Raised", "Operating", "Exited", "Bankrupt",
+)
+SDG_OPTIONS = (
+    "No poverty (SDG 1)", "Zero hunger (SDG 2)", "Good health and well-being (SDG 3)",
+    "Quality education (SDG 4)", "Gender equality (SDG 5)", "Clean water and sanitation (SDG 6)",
+    "Affordable and clean energy (SDG 7)", "Decent work and economic growth (SDG 8)",
+    "Industry, innovation and infrastructure (SDG 9)", "Reduced inequalities (SDG 10)",
+    "Sustainable cities and communities (SDG 11)", "Responsible consumption and production (SDG 12)",
+    "Climate action (SDG 13)", "Life below water (SDG 14)", "Life on land (SDG 15)",
+    "Peace, justice, and strong institutions (SDG 16)", "Partnerships for the goals (SDG 17)",
+)
+REGION_OPTIONS = ("Global", "Western Economies", "Africa", "Asia", "SEA", "Latam")
+MATURITY_STAGES = ("Ideation", "Validation", "Pilot", "Growth", "Scale", "Mature")
+SECTOR_OPTIONS = (
+    "Agriculture", "Air", "Biodiversity & ecosystems", "Climate", "Diversity & inclusion",
+    "Education", "Employment / Livelihoods creation", "Energy", "Financial services",
+    "Health", "Infrastructure", "Land", "Oceans & coastal zones",
+    "Sustainable cities", "Sustainable consumption & production", "Sustainable tourism",
+    "Water Treatment", "Other",
+)
+# ISO‑style country display list
+COUNTRY_OPTIONS = (
+    "Afghanistan","Albania","Algeria","American Samoa","Andorra","Angola",
+    "Anguilla","Antarctica","Antigua And Barbuda","Argentina","Armenia",
+    "Aruba","Australia","Austria","Azerbaijan","Bahamas The","Bahrain",
+    "Bangladesh","Barbados","Belarus","Belgium","Belize","Benin","Bermuda",
+    "Bhutan","Bolivia","Bosnia and Herzegovina","Botswana","Bouvet Island",
+    "Brazil","British Indian Ocean Territory","Brunei","Bulgaria",
+    "Burkina Faso","Burundi","Cambodia","Cameroon","Canada","Cape Verde",
+    "Cayman Islands","Central African Republic","Chad","Chile","China",
+    "Christmas Island","Cocos (Keeling) Islands","Colombia","Comoros",
+    "Republic Of The Congo","Democratic Republic Of The Congo","Cook Islands",
+    "Costa Rica","Cote D'Ivoire (Ivory Coast)","Croatia (Hrvatska)","Cuba",
+    "Cyprus","Czech Republic","Denmark","Djibouti","Dominica",
+    "Dominican Republic","East Timor","Ecuador","Egypt","El Salvador",
+    "Equatorial Guinea","Eritrea","Estonia","Ethiopia",
+    "External Territories of Australia","Falkland Islands","Faroe Islands",
+    "Fiji Islands","Finland","France","French Guiana","French Polynesia",
+    "French Southern Territories","Gabon","Gambia The","Georgia","Germany",
+    "Ghana","Gibraltar","Greece","Greenland","Grenada","Guadeloupe","Guam",
+    "Guatemala","Guernsey and Alderney","Guinea","Guinea-Bissau","Guyana",
+    "Haiti","Heard and McDonald Islands","Honduras","Hong Kong S.A.R.",
+    "Hungary","Iceland","India","Indonesia","Iran","Iraq","Ireland","Israel",
+    "Italy","Jamaica","Japan","Jersey","Jordan","Kazakhstan","Kenya",
+    "Kiribati","Korea North","Korea South","Kuwait","Kyrgyzstan","Laos",
+    "Latvia","Lebanon","Lesotho","Liberia","Libya","Liechtenstein",
+    "Lithuania","Luxembourg","Macau S.A.R.","Macedonia","Madagascar",
+    "Malawi","Malaysia","Maldives","Mali","Malta","Marshall Islands",
+    "Martinique","Mauritania","Mauritius","Mayotte","Mexico","Micronesia",
+    "Moldova","Monaco","Mongolia","Montenegro","Montserrat","Morocco",
+    "Mozambique","Myanmar (Burma)","Namibia","Nauru","Nepal","Netherlands",
+    "Netherlands Antilles","New Caledonia","New Zealand","Nicaragua","Niger",
+    "Nigeria","Niue","Norfolk Island","Northern Mariana Islands","Norway",
+    "Oman","Pakistan","Palau","Palestinian Territories","Panama",
+    "Papua New Guinea","Paraguay","Peru","Philippines","Pitcairn Islands",
+    "Poland","Portugal","Puerto Rico","Qatar","Reunion","Romania","Russia",
+    "Rwanda","Saint Helena","Saint Kitts and Nevis","Saint Lucia",
+    "Saint Pierre and Miquelon","Saint Vincent and the Grenadines","Samoa",
+    "San Marino","Sao Tome and Principe","Saudi Arabia","Senegal","Serbia",
+    "Seychelles","Sierra Leone","Singapore","Slovakia","Slovenia",
+    "Solomon Islands","Somalia","South Africa",
+    "South Georgia and the South Sandwich Islands","Spain","Sri Lanka",
+    "Sudan","Suriname","Svalbard and Jan Mayen","Swaziland","Sweden",
+    "Switzerland","Syria","Taiwan","Tajikistan","Tanzania","Thailand",
+    "Timor-Leste (East Timor)","Togo","Tokelau","Tonga","Trinidad and Tobago",
+    "Tunisia","Turkey","Turkmenistan","Turks and Caicos Islands","Tuvalu",
+    "Uganda","Ukraine","United Arab Emirates","United Kingdom",
+    "United States","United States Minor Outlying Islands","Uruguay",
+    "Uzbekistan","Vanuatu","Vatican City","Venezuela","Vietnam",
+    "Virgin Islands, British","Virgin Islands, U.S.","Wallis and Futuna",
+    "Western Sahara","Yemen","Zambia","Zimbabwe",
+)
+
+# Option -> position, for O(1) selectbox default lookups
+MATURITY_STAGES_IDX = {s: i for i, s in enumerate(MATURITY_STAGES)}
+REVIEW_STAGES_IDX = {s: i for i, s in enumerate(REVIEW_STAGES)}
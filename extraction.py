@@ -0,0 +1,104 @@
+"""
+Text extraction from pitch documents (PDF, DOCX, PPTX, XLS/XLSX).
+
+Kept free of Streamlit so it can run as its own worker process
+(``python extraction.py SUFFIX [PATH]``, see extract_isolated) without
+importing the app.
+"""
+import csv
+import io
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import fitz  # PyMuPDF
+from docx import Document
+from pptx import Presentation
+from python_calamine import CalamineWorkbook
+
+from constants import CHARS_PER_TOKEN, MAX_PITCH_TOKENS
+
+# enough text to fill the app's GPT budget
+MAX_EXTRACT_CHARS = MAX_PITCH_TOKENS * CHARS_PER_TOKEN
+
+# PyMuPDF is not thread-safe, even across documents: serialise its use
+# within a process (a worker process parses a single document)
+_FITZ_LOCK = threading.Lock()
+
+def extract_text_from_pdf(src: Union[str, bytes], max_chars: int = MAX_EXTRACT_CHARS) -> str:
+    """Stop at max_chars so later pages of large decks are never rendered."""
+    parts, total = [], 0
+    with _FITZ_LOCK:
+        doc = fitz.open(src) if isinstance(src, str) else fitz.open(stream=src, filetype="pdf")
+        with doc:
+            for page in doc:
+                t = page.get_text("text")
+                parts.append(t)
+                total += len(t)
+                if total >= max_chars:
+                    break
+    return "\n".join(parts)
+
+def _sheet_to_csv(wb: CalamineWorkbook) -> str:
+    """First sheet as CSV text, streamed row by row (no DataFrame)."""
+    rows = wb.get_sheet_by_index(0).to_python()
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return buf.getvalue()
+
+def _extract_text(src: Union[str, bytes], ext: str) -> str:
+    """Dispatch on extension; `src` is a file path or the file's raw bytes."""
+    if ext == ".pdf": return extract_text_from_pdf(src)
+    fileobj = src if isinstance(src, str) else io.BytesIO(src)
+    if ext == ".docx":
+        doc = Document(fileobj)
+        return "\n".join(p.text for p in doc.paragraphs)
+    if ext == ".pptx":
+        prs = Presentation(fileobj)
+        return "\n".join(
+            shape.text
+            for slide in prs.slides
+            for shape in slide.shapes
+            if hasattr(shape, "text")
+        )
+    if ext in (".xls", ".xlsx"):
+        try:
+            wb = (CalamineWorkbook.from_path(src) if isinstance(src, str)
+                  else CalamineWorkbook.from_filelike(fileobj))
+            return _sheet_to_csv(wb)
+        except Exception: return ""
+    return ""
+
+def extract_text_from_file(path: str) -> str:
+    return _extract_text(path, Path(path).suffix.lower())
+
+def extract_text_from_bytes(data: bytes, suffix: str) -> str:
+    """In-memory sibling of extract_text_from_file (no disk round-trip)."""
+    return _extract_text(data, suffix.lower())
+
+def extract_isolated(suffix: str, data: Optional[bytes] = None, path: Optional[str] = None,
+                     timeout: Optional[float] = None) -> str:
+    """
+    Parse `path` (else `data`) in a fresh ``python extraction.py`` process.
+    Unlike a multiprocessing pool, whose "spawn" workers re-import the
+    parent's __main__ (under Streamlit: the whole app), the child only
+    imports this module; on timeout subprocess.run kills it.
+    Raises subprocess.TimeoutExpired or subprocess.CalledProcessError.
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), suffix] + ([path] if path else [])
+    proc = subprocess.run(cmd, input=data, capture_output=True, timeout=timeout, check=True)
+    return proc.stdout.decode("utf-8")
+
+def _main(argv: list) -> int:
+    """Worker entry point: parse PATH, or the bytes on stdin; text to stdout."""
+    suffix, path = argv[0], argv[1] if len(argv) > 1 else None
+    text = (extract_text_from_file(path) if path
+            else extract_text_from_bytes(sys.stdin.buffer.read(), suffix))
+    sys.stdout.buffer.write(text.encode("utf-8", "replace"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
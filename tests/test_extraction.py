@@ -0,0 +1,69 @@
+"""
+Worker-process extraction must never execute app.py.
+
+Streamlit's ScriptRunner installs a synthetic ``__main__`` whose ``__file__``
+is app.py; multiprocessing's "spawn" re-runs that path in every child. The
+tests below recreate that situation with a sentinel ``__main__`` script and
+check that extraction.extract_isolated leaves it untouched.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import fitz  # PyMuPDF
+
+import extraction
+
+
+def _pdf_bytes(text: str) -> bytes:
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class ExtractIsolatedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.marker = os.path.join(self.tmp.name, "app_was_executed")
+        # stand-in for app.py: leaves a marker if anything runs it
+        script = os.path.join(self.tmp.name, "app.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(f"open({self.marker!r}, 'w').close()\n")
+        fake_main = types.ModuleType("__main__")
+        fake_main.__file__ = script
+        self._real_main = sys.modules["__main__"]
+        sys.modules["__main__"] = fake_main
+
+    def tearDown(self):
+        sys.modules["__main__"] = self._real_main
+        self.tmp.cleanup()
+
+    def test_bytes_parse_does_not_execute_main(self):
+        text = extraction.extract_isolated(".pdf", data=_pdf_bytes("Solar microgrids for Kenya"))
+        self.assertIn("Solar microgrids for Kenya", text)
+        self.assertFalse(os.path.exists(self.marker))
+
+    def test_path_parse_does_not_execute_main(self):
+        path = os.path.join(self.tmp.name, "deck.pdf")
+        with open(path, "wb") as f:
+            f.write(_pdf_bytes("Clean water kiosks"))
+        text = extraction.extract_isolated(".pdf", path=path)
+        self.assertIn("Clean water kiosks", text)
+        self.assertFalse(os.path.exists(self.marker))
+
+    def test_timeout_raises(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            extraction.extract_isolated(".pdf", data=_pdf_bytes("slow"), timeout=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()